@@ -17,8 +17,8 @@ from .schemas import (
   FirstFieldsResponse,
   FirstFieldInfo,
 )
-from .services.storage import SAVE_ROOT, save_yaml_document
-from .services.yaml_parser import analyze_blocks, validate_document, extract_variables, extract_first_fields
+from .services.storage import save_yaml_document
+from .services.yaml_parser import iter_analyses, validate_document, extract_variables, extract_first_fields
 
 
 app = FastAPI(
@@ -42,32 +42,35 @@ async def healthcheck() -> dict[str, str]:
 
 @app.post('/parse', response_model=ParseResponse)
 async def parse_yaml(request: ParseRequest) -> ParseResponse:
+  # The values come straight from our own parser, so skip pydantic's
+  # per-field validation with model_construct.
   try:
-    analyses = analyze_blocks(request.yaml)
+    blocks = [
+      BlockSummary.model_construct(
+        id=analysis.id,
+        type=analysis.type,
+        label=analysis.label,
+        language=analysis.language,  # type: ignore[arg-type]
+        position=analysis.position,
+        order_items=analysis.order_items or None,
+        isMandatory=analysis.is_mandatory,
+      )
+      for analysis in iter_analyses(request.yaml)
+    ]
   except ValueError as exc:
     raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-  blocks = [
-    BlockSummary(
-      id=analysis.id,
-      type=analysis.type,
-      label=analysis.label,
-      language=analysis.language,  # type: ignore[arg-type]
-      position=analysis.position,
-      order_items=analysis.order_items or None,
-      isMandatory=analysis.is_mandatory,
-    )
-    for analysis in analyses
-  ]
-
-  return ParseResponse(blocks=blocks)
+  return ParseResponse.model_construct(blocks=blocks)
 
 
 @app.post('/validate', response_model=ValidateResponse)
 async def validate_yaml(request: ValidateRequest) -> ValidateResponse:
   messages = validate_document(request.yaml)
-  issues = [ValidationIssue(block_id=None, level='error', message=message) for message in messages]
-  return ValidateResponse(issues=issues, valid=len(issues) == 0)
+  issues = [
+    ValidationIssue.model_construct(block_id=None, level='error', message=message)
+    for message in messages
+  ]
+  return ValidateResponse.model_construct(issues=issues, valid=len(issues) == 0)
 
 
 @app.post('/variables', response_model=VariablesResponse)
@@ -82,30 +85,49 @@ async def get_first_fields(request: ParseRequest) -> FirstFieldsResponse:
   Extract first fields from question blocks for interview order suggestions.
   Detects list iterators and suggests .gather() instead.
   """
-  first_fields = extract_first_fields(request.yaml)
-  return FirstFieldsResponse(first_fields=[FirstFieldInfo(**f) for f in first_fields])
+  first_fields = [
+    FirstFieldInfo.model_construct(
+      field=record.field,
+      question_id=record.question_id,
+      is_list=record.is_list,
+      list_name=record.list_name,
+      suggestion=record.suggestion,
+    )
+    for record in extract_first_fields(request.yaml)
+  ]
+  return FirstFieldsResponse.model_construct(first_fields=first_fields)
 
 
 @app.post('/save', response_model=SaveResponse)
-async def save_yaml(request: SaveRequest) -> SaveResponse:
+def save_yaml(request: SaveRequest) -> SaveResponse:
+  # Declared sync on purpose: FastAPI runs it on the threadpool, so the
+  # blocking open/write syscalls overlap across concurrent saves instead of
+  # stalling the event loop one request at a time.
   try:
     result = save_yaml_document(request.yaml, request.document_name)
   except ValueError as exc:
     raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-  try:
-    saved_path = str(result.file_path.relative_to(SAVE_ROOT))
-  except ValueError:
-    saved_path = str(result.file_path)
-
   return SaveResponse(
     document_name=result.document_name,
-    saved_path=saved_path,
+    saved_path=result.saved_path,
     bytes_written=result.bytes_written,
   )
 
 
 def run() -> None:  # pragma: no cover - convenience entrypoint
+  import os
+
   import uvicorn
 
-  uvicorn.run('app.main:app', host='0.0.0.0', port=8000, reload=True)
+  reload = os.getenv('DEV') == '1'
+  uvicorn.run(
+    'app.main:app',
+    host='0.0.0.0',
+    port=8000,
+    loop='uvloop',
+    http='httptools',
+    # reload and multiple workers are mutually exclusive in uvicorn.
+    workers=1 if reload else int(os.getenv('WEB_CONCURRENCY', '1')),
+    reload=reload,
+  )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import itertools
+import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
@@ -9,13 +10,17 @@ from pathlib import Path
 SAVE_ROOT = Path(__file__).resolve().parent.parent / 'data' / 'saved_interviews'
 SAVE_ROOT.mkdir(parents=True, exist_ok=True)
 
-_UNSAFE_PATTERN = re.compile(r'[^A-Za-z0-9._-]+')
+# re.ASCII keeps the character-class match out of the Unicode tables; the
+# class itself is ASCII-only anyway.
+_UNSAFE_PATTERN = re.compile(r'[^A-Za-z0-9._-]+', re.ASCII)
+_YAML_SUFFIXES = frozenset({'yml', 'yaml'})
 
 
 @dataclass(slots=True)
 class SaveResult:
   document_name: str
   file_path: Path
+  saved_path: str
   bytes_written: int
 
 
@@ -27,25 +32,33 @@ def _sanitize_filename(document_name: str | None) -> str:
   candidate = Path(candidate).name  # Strip directory segments if provided.
   candidate = _UNSAFE_PATTERN.sub('_', candidate)
 
-  lower = candidate.lower()
-  if not (lower.endswith('.yml') or lower.endswith('.yaml')):
+  if '.' not in candidate or candidate.rsplit('.', 1)[-1].lower() not in _YAML_SUFFIXES:
     candidate = f'{candidate or "untitled"}.yml'
 
   return candidate
 
 
-def _unique_path(filename: str) -> Path:
-  path = SAVE_ROOT / filename
-  if not path.exists():
-    return path
+def _write_unique(filename: str, encoded: bytes) -> Path:
+  """
+  Claim the first free name derived from `filename` and write the payload.
+
+  O_EXCL makes the claim atomic, so two concurrent saves probing the same
+  name cannot overwrite each other the way a stat-then-write sequence could.
+  """
+  base = SAVE_ROOT / filename
+  stem = base.stem
+  suffix = base.suffix or '.yml'
 
-  stem = path.stem
-  suffix = path.suffix or '.yml'
+  for index in itertools.count():
+    candidate = base if index == 0 else base.with_name(f'{stem}-{index}{suffix}')
+    try:
+      fd = os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+      continue
 
-  for index in itertools.count(1):
-    candidate = path.with_name(f'{stem}-{index}{suffix}')
-    if not candidate.exists():
-      return candidate
+    with open(fd, 'wb') as handle:
+      handle.write(encoded)
+    return candidate
 
   raise RuntimeError('Unable to derive a unique filename for saving document.')  # pragma: no cover
 
@@ -58,10 +71,14 @@ def save_yaml_document(yaml_content: str, document_name: str | None = None) -> S
     raise ValueError('YAML content is required.')
 
   filename = _sanitize_filename(document_name)
-  path = _unique_path(filename)
-
   encoded = yaml_content.encode('utf-8')
-  path.write_bytes(encoded)
-
-  relative_document_name = path.name
-  return SaveResult(document_name=relative_document_name, file_path=path, bytes_written=len(encoded))
+  path = _write_unique(filename, encoded)
+
+  # Saves always land flat inside SAVE_ROOT, so the SAVE_ROOT-relative path
+  # is simply the final name; report it here so callers never re-derive it.
+  return SaveResult(
+    document_name=path.name,
+    file_path=path,
+    saved_path=path.name,
+    bytes_written=len(encoded),
+  )
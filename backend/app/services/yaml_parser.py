@@ -1,18 +1,35 @@
 from __future__ import annotations
 
 import ast
+import atexit
 from dataclasses import dataclass
-from typing import Any, Iterable
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator
 import importlib
+import re
+import sys
 import tempfile
 import os
 
-from ruamel.yaml import YAML
-from ruamel.yaml.error import YAMLError
+import yaml as _pyyaml
+from yaml.error import YAMLError
 
-yaml = YAML(typ='rt')
-yaml.preserve_quotes = True
-yaml.width = 4096
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - libyaml bindings unavailable
+    from yaml import SafeLoader as _YamlLoader
+
+
+def _parse(chunk: str) -> Any:
+    """
+    Load a single YAML chunk with the libyaml-backed safe loader.
+
+    The endpoints only read plain scalars off the parsed data, so the
+    round-trip fidelity (comments, quotes, anchors) of ruamel's rt mode
+    is unnecessary overhead here.
+    """
+    return _pyyaml.load(chunk, Loader=_YamlLoader)
 
 
 BLOCK_TYPES = (
@@ -49,7 +66,11 @@ BLOCK_TYPES = (
     'order',
 )
 
-LANGUAGE_MAP = {
+_BLOCK_TYPES_SET = frozenset(BLOCK_TYPES)
+_BLOCK_TYPE_PRIORITY = {block_type: index for index, block_type in enumerate(BLOCK_TYPES)}
+
+# Read-only lookups; the proxy guards against accidental mutation at runtime.
+LANGUAGE_MAP = MappingProxyType({
     'metadata': 'yaml',
     'objects': 'yaml',
     'question': 'yaml',
@@ -64,7 +85,6 @@ LANGUAGE_MAP = {
     'translations': 'yaml',
     'include': 'yaml',
     'default screen parts': 'yaml',
-    'metadata': 'yaml',
     'modules': 'yaml',
     'imports': 'yaml',
     'sections': 'yaml',
@@ -73,7 +93,6 @@ LANGUAGE_MAP = {
     'default validation messages': 'yaml',
     'machine learning storage': 'yaml',
     'initial': 'yaml',
-    'event': 'yaml',
     'comment': 'yaml',
     'data': 'yaml',
     'data from code': 'yaml',
@@ -82,7 +101,11 @@ LANGUAGE_MAP = {
     'image sets': 'yaml',
     'images': 'yaml',
     'order': 'yaml',
-}
+})
+
+# Language per BLOCK_TYPES position, so analysis can index instead of hashing
+# the block type a second time.
+_LANG_BY_INDEX = tuple(LANGUAGE_MAP.get(block_type, 'yaml') for block_type in BLOCK_TYPES)
 
 DATATYPE_MAP = {
     'text': 'str',
@@ -108,6 +131,11 @@ DATATYPE_MAP = {
     'files': 'list',
 }
 
+# Extraction results are dicts of these few type names repeated many times;
+# interning guarantees every occurrence shares one string object, including
+# names derived dynamically from AST constants below.
+DATATYPE_MAP = MappingProxyType({key: sys.intern(value) for key, value in DATATYPE_MAP.items()})
+
 
 @dataclass(slots=True)
 class BlockAnalysis:
@@ -118,120 +146,226 @@ class BlockAnalysis:
     position: int
     order_items: list[str]
     is_mandatory: bool
+    has_interview_order: bool = False
+
+
+@dataclass(slots=True)
+class FirstField:
+    field: str
+    question_id: str
+    is_list: bool
+    list_name: str | None
+    suggestion: str
+
+
+_TRUTHY_STRINGS = frozenset({'true', 'yes', '1', 'on'})
+# Casings YAML emitters commonly produce, accepted without the strip/lower
+# allocations of the fallback path.
+_TRUE_STRINGS = frozenset({'true', 'True', 'TRUE', 'yes', 'Yes', 'YES', '1', 'on', 'On'})
 
 
 def _coerce_bool(value: Any) -> bool:
-    if isinstance(value, bool):
+    # YAML-parsed mandatory flags are overwhelmingly real booleans; two
+    # identity tests answer that case without an isinstance call.
+    if value is True or value is False:
         return value
     if isinstance(value, str):
-        normalized = value.strip().lower()
-        return normalized in {'true', 'yes', '1', 'on'}
+        if value in _TRUE_STRINGS:
+            return True
+        return value.strip().lower() in _TRUTHY_STRINGS
     if isinstance(value, (int, float)):
         return bool(value)
     return False
 
 
+# Docassemble document separator: a `---` line at column zero. The optional
+# CR keeps CRLF documents splitting, and consuming the trailing newline
+# leaves less for the per-part strip to chew through.
+_DOC_SEP = re.compile(r'(?m)^---[ \t]*\r?$\n?')
+
+
 def _split_blocks(document: str) -> list[str]:
-    cleaned = document.strip()
-    if not cleaned:
-        return []
-    parts = []
-    buffer: list[str] = []
-
-    for line in cleaned.splitlines():
-        if line.strip() == '---':
-            part = '\n'.join(buffer).strip()
-            if part:
-                parts.append(part)
-            buffer = []
-            continue
-        buffer.append(line)
+    stripped = (part.strip() for part in _DOC_SEP.split(document))
+    return [part for part in stripped if part]
+
+
+_CODE_INDEX = _BLOCK_TYPE_PRIORITY['code']
 
-    tail = '\n'.join(buffer).strip()
-    if tail:
-        parts.append(tail)
 
-    return parts
+def _guess_block_type_index(data: dict) -> int:
+    matches = _BLOCK_TYPES_SET & data.keys()
+    if not matches:
+        return _CODE_INDEX
+    # Resolve ties by the declaration order of BLOCK_TYPES, matching the old
+    # linear scan.
+    return min(map(_BLOCK_TYPE_PRIORITY.__getitem__, matches))
 
 
 def _guess_block_type(data: dict) -> str:
-    for candidate in BLOCK_TYPES:
-        if candidate in data:
-            return candidate
-    if 'question' in data:
-        return 'question'
-    return 'code'
+    return BLOCK_TYPES[_guess_block_type_index(data)]
+
+
+# `#### interview order ####` marker comments, e.g. in AssemblyLine interviews.
+_INTERVIEW_ORDER_COMMENT = re.compile(r'#+\s*interview\s+order\s*#+', re.IGNORECASE)
+
+# Fields like `users[i].name` whose index is a list iterator variable.
+_ITERATOR_FIELD = re.compile(r'^(\w+(?:\.\w+)*)\[([ijkn])\](?:\.(\w+(?:\.\w+)*))?$')
+
+
+def _label_metadata(data: dict, raw_chunk: str) -> str | None:
+    meta = data.get('metadata') or {}
+    return f"{meta.get('title')}" if meta.get('title') else None
+
+
+def _label_question(data: dict, raw_chunk: str) -> str | None:
+    question = data.get('question')
+    return f"{question.splitlines()[0]}" if isinstance(question, str) else None
+
+
+def _label_code(data: dict, raw_chunk: str) -> str | None:
+    # Check for interview order patterns; only code blocks can carry them.
+    block_id = data.get('id', '')
+    code = data.get('code')
+
+    # Check id patterns - exact match or contains "interview_order" or "main_order"
+    id_normalized = str(block_id).lower().strip() if block_id else ''
+    if (id_normalized == 'interview order' or
+            'interview_order' in id_normalized or
+            'main_order' in id_normalized):
+        return 'Interview Order'
+
+    # Check for special YAML comment pattern in the raw chunk. The '#'
+    # containment test is a cheap gate: most code blocks carry no
+    # comments at all, and the regex cannot match without one.
+    if '#' in raw_chunk and _INTERVIEW_ORDER_COMMENT.search(raw_chunk):
+        return 'Interview Order'
+
+    # Check for special comment pattern in code (legacy)
+    if isinstance(code, str) and '#' in code:
+        if _INTERVIEW_ORDER_COMMENT.search(code):
+            return 'Interview Order'
+
+    return f"{code.splitlines()[0][:24]}" if isinstance(code, str) and code else None
+
+
+def _label_attachment(data: dict, raw_chunk: str) -> str | None:
+    payload = data.get('attachment') or {}
+    return f"{payload.get('name')}" if payload.get('name') else None
+
+
+def _label_event(data: dict, raw_chunk: str) -> str | None:
+    return f"{data.get('event')}" if data.get('event') else None
+
+
+# Only these block types ever produce a label; everything else short-circuits
+# to None without touching the block's contents.
+_LABEL_DISPATCH = {
+    'metadata': _label_metadata,
+    'question': _label_question,
+    'code': _label_code,
+    'attachment': _label_attachment,
+    'event': _label_event,
+}
 
 
 def _label_for_block(block_type: str, data: dict, raw_chunk: str = '') -> str | None:
     if isinstance(data.get('interview_order'), dict):
         return 'Interview Order'
-    
-    # Check for interview order patterns in code blocks
-    if block_type == 'code':
-        block_id = data.get('id', '')
-        code_content = data.get('code', '')
-        
-        # Normalize block_id for comparison
-        id_normalized = str(block_id).lower().strip() if block_id else ''
-        
-        # Check id patterns - exact match or contains "interview_order" or "main_order"
-        if (id_normalized == 'interview order' or 
-            id_normalized == 'interview_order' or 
-            'interview_order' in id_normalized or 
-            id_normalized == 'main_order' or
-            'main_order' in id_normalized):
-            return 'Interview Order'
-        
-        # Check for special YAML comment pattern in the raw chunk
-        import re
-        if re.search(r'#+\s*interview\s+order\s*#+', raw_chunk, re.IGNORECASE):
-            return 'Interview Order'
-        
-        # Check for special comment pattern in code (legacy)
-        if isinstance(code_content, str):
-            if re.search(r'#+\s*interview\s+order\s*#+', code_content, re.IGNORECASE):
-                return 'Interview Order'
-    
-    if block_type == 'metadata':
-        meta = data.get('metadata') or {}
-        return f"{meta.get('title')}" if meta.get('title') else None
-    if block_type == 'question':
-        question = data.get('question')
-        return f"{question.splitlines()[0]}" if isinstance(question, str) else None
-    if block_type == 'code':
-        code = data.get('code')
-        return f"{code.splitlines()[0][:24]}" if isinstance(code, str) and code else None
-    if block_type == 'attachment':
-        payload = data.get('attachment') or {}
-        return f"{payload.get('name')}" if payload.get('name') else None
-    if block_type == 'event':
-        return f"{data.get('event')}" if data.get('event') else None
-    if block_type == 'objects':
-        return None
-    return None
+
+    handler = _LABEL_DISPATCH.get(block_type)
+    return handler(data, raw_chunk) if handler is not None else None
+
+
+# One non-blank, non-comment line per match, already stripped of surrounding
+# whitespace.
+_ORDER_LINE = re.compile(r'(?m)^[ \t]*(?!#)(\S.*?)[ \t\r]*$')
 
 
 def _order_items_from_code(code: str | None) -> list[str]:
-    if not code:
-        return []
-    return [line.strip() for line in code.splitlines() if line.strip() and not line.strip().startswith('#')]
+    return _ORDER_LINE.findall(code) if code else []
 
 
-def analyze_blocks(document: str) -> list[BlockAnalysis]:
-    analyses: list[BlockAnalysis] = []
-    for position, chunk in enumerate(_split_blocks(document)):
+@lru_cache(maxsize=256)
+def _parse_blocks(document: str) -> tuple[tuple[str, dict], ...]:
+    """
+    Split the document and parse every chunk exactly once.
+
+    Returns (raw_chunk, data) pairs so callers that need the raw text
+    (comment detection) and callers that need the parsed mapping can share
+    a single parse per chunk instead of re-splitting and re-loading.
+
+    Results are memoized on the document text: the editor hits /parse,
+    /validate, and /variables with the same YAML back to back, so repeat
+    submissions become a cache lookup instead of a full re-parse. Callers
+    must treat the returned structures as read-only.
+    """
+    chunks = _split_blocks(document)
+    if not chunks:
+        return ()
+
+    # Feed all chunks to libyaml as one multi-document stream so document
+    # boundaries are handled in a single C pass instead of one loader setup
+    # per chunk. The leading '---' makes every chunk an explicit document,
+    # so libyaml cannot elide a comment-only chunk the way it does for an
+    # implicit leading document; any count drift therefore means a chunk
+    # body itself opened extra documents (e.g. a '--- <value>' line the
+    # bare '---' splitter leaves in place) and the zip below would
+    # misalign, so realign by parsing per chunk.
+    try:
+        datas = list(_pyyaml.load_all('---\n' + '\n---\n'.join(chunks), Loader=_YamlLoader))
+    except YAMLError:
+        # Re-parse chunk by chunk to report which segment is broken.
+        return _parse_blocks_chunkwise(chunks)
+
+    if len(datas) != len(chunks):
+        return _parse_blocks_chunkwise(chunks)
+
+    return tuple((chunk, data or {}) for chunk, data in zip(chunks, datas))
+
+
+def _parse_blocks_chunkwise(chunks: list[str]) -> tuple[tuple[str, dict], ...]:
+    parsed: list[tuple[str, dict]] = []
+    for position, chunk in enumerate(chunks):
         try:
-            data = yaml.load(chunk) or {}
-        except YAMLError as exc:  # pragma: no cover - validation handles this path
+            data = _parse(chunk) or {}
+        except YAMLError as exc:
             raise ValueError(f'Failed to parse YAML segment at index {position}: {exc}') from exc
+        parsed.append((chunk, data))
+    return tuple(parsed)
+
+
+def analyze_blocks(document: str) -> list[BlockAnalysis]:
+    return list(iter_analyses(document))
 
-        block_type = _guess_block_type(data)
+
+@lru_cache(maxsize=64)
+def _cached_analyses(document: str) -> tuple[BlockAnalysis, ...]:
+    return tuple(_analyze_parsed(_parse_blocks(document)))
+
+
+def iter_analyses(document: str) -> Iterator[BlockAnalysis]:
+    """
+    Yield one BlockAnalysis per block so callers that build their own
+    per-block records can do it in a single pass.
+
+    The editor fires /parse, /validate and /variables for the same YAML
+    almost simultaneously, so the analyses are memoized on the document
+    text and the later endpoints get a cache hit instead of redoing the
+    labeling work. Callers must treat the yielded records as read-only.
+    """
+    return iter(_cached_analyses(document))
+
+
+def _analyze_parsed(parsed: Iterable[tuple[str, dict]]) -> Iterator[BlockAnalysis]:
+    for position, (chunk, data) in enumerate(parsed):
+        type_index = _guess_block_type_index(data)
+        block_type = BLOCK_TYPES[type_index]
         label = _label_for_block(block_type, data, chunk)  # Pass raw chunk for comment detection
         order_items: list[str] = []
 
         interview_order_payload = data.get('interview_order')
-        if isinstance(interview_order_payload, dict):
+        has_interview_order = isinstance(interview_order_payload, dict)
+        if has_interview_order:
             code_value = interview_order_payload.get('code')
             code = code_value if isinstance(code_value, str) else None
             order_items = _order_items_from_code(code)
@@ -239,103 +373,148 @@ def analyze_blocks(document: str) -> list[BlockAnalysis]:
         else:
             mandatory_flag = _coerce_bool(data.get('mandatory'))
 
-        analyses.append(
-            BlockAnalysis(
-                id=f'{block_type}-{position}',
-                type=block_type,
-                label=label,
-                language=LANGUAGE_MAP.get(block_type, 'yaml'),
-                position=position,
-                order_items=order_items,
-                is_mandatory=mandatory_flag,
-            ),
+        yield BlockAnalysis(
+            id=f'{block_type}-{position}',
+            type=block_type,
+            label=label,
+            language=_LANG_BY_INDEX[type_index],
+            position=position,
+            order_items=order_items,
+            is_mandatory=mandatory_flag,
+            has_interview_order=has_interview_order,
         )
 
-    return analyses
+
+# tmpfs directory for the temp file handed to dayamlchecker, if the host has
+# one; None falls back to the platform default TMPDIR.
+_TMPFS_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def _dayaml_string_checker(dayaml_mod: Any):
+    """
+    Return an entrypoint of `dayaml_mod` that accepts the document text
+    directly, or None when only the filename-based `find_errors` exists.
+    """
+    for name in ('find_errors_from_string', 'find_errors_in_text'):
+        checker = getattr(dayaml_mod, name, None)
+        if callable(checker):
+            return checker
+    return None
+
+
+# Single per-process temp file reused for every filename-based
+# dayamlchecker call, created lazily on first use.
+_dayaml_tmp = None
+
+
+def _dayaml_tmp_path(document: str) -> str:
+    """
+    Write the document into a reused per-process temp file and return its
+    path, avoiding create/unlink inode churn on every validation.
+    """
+    global _dayaml_tmp
+    if _dayaml_tmp is None:
+        _dayaml_tmp = tempfile.NamedTemporaryFile(
+            mode='w', suffix='.yml', dir=_TMPFS_DIR, delete=False
+        )
+        atexit.register(_cleanup_dayaml_tmp)
+
+    _dayaml_tmp.seek(0)
+    _dayaml_tmp.truncate()
+    _dayaml_tmp.write(document)
+    _dayaml_tmp.flush()
+    return _dayaml_tmp.name
+
+
+def _cleanup_dayaml_tmp() -> None:  # pragma: no cover - process teardown
+    if _dayaml_tmp is not None:
+        try:
+            _dayaml_tmp.close()
+            os.unlink(_dayaml_tmp.name)
+        except OSError:
+            pass
+
+
+# The third-party DAYamlChecker is optional; resolve it once at import so
+# validate_document does not take the importlib/sys.modules locks per request.
+try:
+    _DAYAML_MOD = importlib.import_module("dayamlchecker.yaml_structure")
+except Exception:
+    _DAYAML_MOD = None
+_DAYAML_STRING_CHECKER = _dayaml_string_checker(_DAYAML_MOD) if _DAYAML_MOD else None
 
 
 def validate_document(document: str) -> list[str]:
+    return list(_cached_validation(document))
+
+
+@lru_cache(maxsize=64)
+def _cached_validation(document: str) -> tuple[str, ...]:
     issues: list[str] = []
 
     # Prefer using the third-party DAYamlChecker if available. It validates
-    # docassemble YAML structure and returns structured errors. We call its
-    # `find_errors` function by writing the document to a temporary file
-    # (the module expects a filename).
-    dayaml_mod = None
-    try:
-        dayaml_mod = importlib.import_module("dayamlchecker.yaml_structure")
-    except Exception:
-        dayaml_mod = None
+    # docassemble YAML structure and returns structured errors.
+    dayaml_mod = _DAYAML_MOD
 
     if dayaml_mod is not None:
-        tmp_path = None
-        try:
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as tf:
-                tf.write(document)
-                tf.flush()
-                tmp_path = tf.name
-
+        checker = _DAYAML_STRING_CHECKER
+        if checker is not None:
+            # In-memory entrypoint: no filesystem round-trip at all.
             try:
-                errors = dayaml_mod.find_errors(tmp_path) or []
+                for e in checker(document) or []:
+                    # The YAMLError class in the package implements __str__
+                    issues.append(str(e))
+            except Exception as exc:  # pragma: no cover - defensive
+                issues.append(f"dayamlchecker validation failed: {exc}")
+        else:
+            # `find_errors` expects a filename; reuse one tmpfs-backed temp
+            # file per process so the round-trip never hits a block device
+            # and never churns inodes.
+            try:
+                errors = dayaml_mod.find_errors(_dayaml_tmp_path(document)) or []
                 for e in errors:
                     # The YAMLError class in the package implements __str__
                     issues.append(str(e))
             except Exception as exc:  # pragma: no cover - defensive
                 issues.append(f"dayamlchecker validation failed: {exc}")
-        finally:
-            if tmp_path:
-                try:
-                    os.unlink(tmp_path)
-                except Exception:
-                    pass
 
     try:
-        blocks = analyze_blocks(document)
+        blocks = _cached_analyses(document)
     except ValueError as exc:
         issues.append(str(exc))
-        return issues
-
-    seen_mandatory = False
+        return tuple(issues)
 
     for block in blocks:
-        if block.type not in BLOCK_TYPES:
+        if block.type not in _BLOCK_TYPES_SET:
             issues.append(f'Unsupported block type "{block.type}" at position {block.position}.')
 
-    for chunk in _split_blocks(document):
-        try:
-            data = yaml.load(chunk) or {}
-        except YAMLError as exc:  # pragma: no cover
-            issues.append(f'Invalid YAML block: {exc}')
-            continue
-
-        if 'interview_order' in data:
-            metadata = data['interview_order'] or {}
-            mandatory = metadata.get('mandatory')
-            mandatory_flag = _coerce_bool(mandatory)
-            if mandatory_flag and seen_mandatory:
-                issues.append('Only one mandatory interview_order block is allowed.')
-            seen_mandatory = seen_mandatory or mandatory_flag
+    mandatory_count = sum(1 for block in blocks if block.has_interview_order and block.is_mandatory)
+    if mandatory_count > 1:
+        issues.append('Only one mandatory interview_order block is allowed.')
 
-    return issues
+    return tuple(issues)
 
 
 def iter_blocks(document: str) -> Iterable[dict]:
-    for chunk in _split_blocks(document):
-        try:
-            yield yaml.load(chunk) or {}
-        except YAMLError:  # pragma: no cover - validated separately
-            continue
+    try:
+        parsed = _parse_blocks(document)
+    except ValueError:
+        # One broken chunk should not hide the parseable ones, so fall back
+        # to per-chunk loading and skip only the chunks that fail.
+        for chunk in _split_blocks(document):
+            try:
+                yield _parse(chunk) or {}
+            except YAMLError:  # pragma: no cover - validated separately
+                continue
+        return
+
+    for _chunk, data in parsed:
+        yield data
 
 
 def _get_type_from_ast_node(node: ast.expr) -> str:
     if isinstance(node, ast.Constant):
-        return type(node.value).__name__
-    if isinstance(node, ast.Num):
-        return type(node.n).__name__
-    if isinstance(node, ast.Str):
-        return 'str'
-    if isinstance(node, ast.NameConstant):
-        return type(node.value).__name__
+        return sys.intern(type(node.value).__name__)
     if isinstance(node, (ast.List, ast.ListComp)):
         return 'list'
     if isinstance(node, (ast.Dict, ast.DictComp)):
@@ -347,23 +526,44 @@ def _get_type_from_ast_node(node: ast.expr) -> str:
     return 'Any'
 
 
+class _AssignCollector(ast.NodeVisitor):
+    """
+    Collects name assignments at module level and inside control-flow
+    statements, without descending into function or class bodies — those
+    targets are locals of their own scope, not interview variables.
+    """
+
+    def __init__(self) -> None:
+        self.variables: dict[str, str] = {}
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        var_type = _get_type_from_ast_node(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.variables[target.id] = var_type
+
+    def _skip_scope(self, node: ast.AST) -> None:
+        pass
+
+    visit_FunctionDef = _skip_scope
+    visit_AsyncFunctionDef = _skip_scope
+    visit_ClassDef = _skip_scope
+    visit_Lambda = _skip_scope
+
+
 def _extract_variables_from_code(code: str) -> dict[str, str]:
     """
     Parses a Python code snippet and extracts the names of variables being assigned
     and their inferred Python types.
     """
-    variables = {}
     try:
         tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                var_type = _get_type_from_ast_node(node.value)
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        variables[target.id] = var_type
     except (SyntaxError, TypeError):
-        pass
-    return variables
+        return {}
+
+    collector = _AssignCollector()
+    collector.visit(tree)
+    return collector.variables
 
 
 def extract_variables(document: str) -> list[dict[str, str]]:
@@ -371,44 +571,57 @@ def extract_variables(document: str) -> list[dict[str, str]]:
     Parses a YAML document and extracts a list of all defined variables
     with their inferred Python types.
     """
-    variables: dict[str, str] = {}
-    all_blocks = list(iter_blocks(document))
+    return list(_cached_variables(document))
+
+
+@lru_cache(maxsize=64)
+def _cached_variables(document: str) -> tuple[dict[str, str], ...]:
+    return _extract_vars_from_parsed(iter_blocks(document))
 
-    # Pass 1: from code blocks (lower priority)
-    for block in all_blocks:
-        if 'code' in block and isinstance(block['code'], str):
-            code_variables = _extract_variables_from_code(block['code'])
-            for name, type_ in code_variables.items():
-                variables[name] = type_
 
-    # Pass 2: from fields (higher priority)
+def _extract_vars_from_parsed(all_blocks: Iterable[dict]) -> tuple[dict[str, str], ...]:
+    """
+    Walk already-parsed block mappings and collect variable definitions.
+
+    Only the 'code' and 'fields' leaves are touched; everything else in a
+    block is left alone, so extraction cost tracks the parts of the
+    document that can actually define variables.
+    """
+    code_vars: dict[str, str] = {}
+    field_vars: dict[str, str] = {}
+
     for block in all_blocks:
-        if 'fields' in block and isinstance(block['fields'], list):
-            for field in block['fields']:
+        code = block.get('code')
+        if isinstance(code, str):
+            code_vars.update(_extract_variables_from_code(code))
+
+        fields = block.get('fields')
+        if isinstance(fields, list):
+            for field in fields:
                 if isinstance(field, dict) and field:
                     first_key = next(iter(field))
                     variable_name = field[first_key]
                     if isinstance(variable_name, str):
                         datatype = field.get('datatype', 'text')
                         py_type = DATATYPE_MAP.get(datatype, 'Any')
-                        variables[variable_name] = py_type
+                        field_vars[variable_name] = py_type
+
+    # Field declarations take precedence over types inferred from code.
+    variables = {**code_vars, **field_vars}
 
-    result = [{'name': name, 'type': type_} for name, type_ in variables.items()]
-    return sorted(result, key=lambda v: v['name'])
+    # Sort the lightweight (name, type) pairs first; building the result
+    # dicts afterwards avoids a per-element key lambda in the sort.
+    return tuple({'name': name, 'type': type_} for name, type_ in sorted(variables.items()))
 
 
-def extract_first_fields(document: str) -> list[dict[str, Any]]:
+def extract_first_fields(document: str) -> list[FirstField]:
     """
     Extracts the first field from each question block for use in interview order suggestions.
     Also detects if the field uses list iterators like [i], [j], etc. and suggests .gather() instead.
-    Returns a list of dicts with 'field', 'question_id', 'is_list', 'list_name'.
+    Returns a list of FirstField records.
     """
-    first_fields = []
-    all_blocks = list(iter_blocks(document))
-    
-    import re
-    
-    for block in all_blocks:
+    first_fields: list[FirstField] = []
+    for block in iter_blocks(document):
         # Only process question blocks with fields
         if 'fields' not in block or not isinstance(block['fields'], list) or len(block['fields']) == 0:
             continue
@@ -427,27 +640,26 @@ def extract_first_fields(document: str) -> list[dict[str, Any]]:
             continue
         
         # Check for list iterators like [i], [j], [k], etc.
-        iterator_pattern = re.compile(r'^(\w+(?:\.\w+)*)\[([ijkn])\](?:\.(\w+(?:\.\w+)*))?$')
-        match = iterator_pattern.match(variable_name)
+        match = _ITERATOR_FIELD.match(variable_name)
         
         if match:
             # This is a list with iterator, suggest .gather() instead
             list_name = match.group(1)
-            first_fields.append({
-                'field': variable_name,
-                'question_id': question_id,
-                'is_list': True,
-                'list_name': list_name,
-                'suggestion': f'{list_name}.gather()',
-            })
+            first_fields.append(FirstField(
+                field=variable_name,
+                question_id=question_id,
+                is_list=True,
+                list_name=list_name,
+                suggestion=f'{list_name}.gather()',
+            ))
         else:
             # Regular field
-            first_fields.append({
-                'field': variable_name,
-                'question_id': question_id,
-                'is_list': False,
-                'list_name': None,
-                'suggestion': variable_name,
-            })
-    
+            first_fields.append(FirstField(
+                field=variable_name,
+                question_id=question_id,
+                is_list=False,
+                list_name=None,
+                suggestion=variable_name,
+            ))
+
     return first_fields